@@ -1,14 +1,333 @@
+import asyncio
+import functools
+import json
 import msal
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
 import urllib.parse
 #import logging
 import os
+import random
 import re
-from datetime import datetime
-from typing import Tuple, Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Tuple, Dict, List, Optional, Iterator, Mapping, NamedTuple
 
-class SharePointAccess:
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON encoding/decoding on large payloads
+    orjson = None
+
+try:
+    import aiohttp
+except ImportError:  # Optional: only needed by AsyncSharePointAccess
+    aiohttp = None
+
+# Graph JSON batching endpoint and its maximum number of subrequests per call
+_BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+_BATCH_LIMIT = 20
+
+# Worksheet range endpoint, relative to the Graph root (for $batch) and absolute
+_WS_RANGE_PATH = "/sites/{site}/drives/{drive}/items/{item}/workbook/worksheets('{sheet}')/range(address='{addr}')"
+_WS_RANGE_URL = "https://graph.microsoft.com/v1.0" + _WS_RANGE_PATH
+
+# Site and drive lookups, relative (for $batch) and absolute, and file content by path
+_SITE_ID_PATH = "/sites/{domain}:{site}?$select=id"
+_DRIVES_PATH = "/sites/{site}/drives?$select=id,name"
+_SITE_ID_URL = "https://graph.microsoft.com/v1.0" + _SITE_ID_PATH
+_DRIVES_URL = "https://graph.microsoft.com/v1.0" + _DRIVES_PATH
+_CONTENT_URL = "https://graph.microsoft.com/v1.0/sites/{site}/drives/{drive}/root:/{folder}/{file}:/content"
+
+# Scope of the client-credentials token, and how long before expiry it is renewed
+_GRAPH_SCOPE = ['https://graph.microsoft.com/.default']
+_TOKEN_REFRESH_MARGIN = 300
+
+# Streaming sizes: download chunk, simple-upload ceiling and upload-session chunk
+# (Graph requires upload-session chunks to be multiples of 320 KiB)
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+_SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024
+_UPLOAD_CHUNK_SIZE = 32 * 320 * 1024
+
+# Transient statuses retried by the transport, and how many times
+_RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+_MAX_TRANSPORT_RETRIES = 5
+
+# Worker threads for concurrent Graph calls; must not exceed the adapter's pool_maxsize
+_MAX_WORKERS = 16
+
+
+def _json_default(obj):
+    """Serializes array-likes (e.g. NumPy arrays and scalars) not handled natively."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _encode_json(payload) -> bytes:
+    """
+    Encodes a request body as JSON bytes, using orjson when it is installed.
+    
+    NumPy arrays are serialized natively by orjson, preserving their dtype
+    instead of boxing every cell into a Python object.
+    
+    Args:
+        payload: The JSON-serializable body.
+    
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_json_default).encode("utf-8")
+
+
+def _decode_json(response: requests.Response):
+    """
+    Decodes a JSON response body, using orjson when it is installed.
+    
+    orjson parses the raw bytes directly, skipping the encoding detection
+    done by requests.Response.json().
+    
+    Args:
+        response (requests.Response): The response to decode.
+    
+    Returns:
+        The decoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _loads_json(body: bytes):
+    """Decodes a JSON body from bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _parse_graph_datetime(value: str) -> datetime:
+    """
+    Parses a Graph ISO-8601 timestamp (e.g. '2024-01-31T08:15:00Z').
+    
+    The trailing 'Z' is dropped so the result stays a naive UTC datetime, as
+    returned by the previous strptime-based parsing.
+    
+    Args:
+        value (str): The timestamp as returned by Graph.
+    
+    Returns:
+        datetime: The parsed timestamp.
+    """
+    return datetime.fromisoformat(value.rstrip('Z'))
+
+
+def _graph_error_code(body) -> str:
+    """Returns the Graph error code of a decoded response body, or '' if it has none."""
+    if isinstance(body, dict) and isinstance(body.get("error"), dict):
+        return body["error"].get("code", "")
+    return ""
+
+
+def _escape_odata(value: str) -> str:
+    """Escapes single quotes for use inside an OData string literal."""
+    return value.replace("'", "''")
+
+
+@functools.lru_cache(maxsize=256)
+def _quote_odata(value: str) -> str:
+    """Escapes and percent-encodes a name (e.g. a worksheet) for an OData key in a URL path."""
+    return urllib.parse.quote(_escape_odata(value))
+
+
+@functools.lru_cache(maxsize=256)
+def _worksheet_url(site_id: str, drive_id: str, item_id: str, worksheet_name: str, api_version: str = "v1.0") -> str:
+    """
+    Builds the Graph URL of a workbook worksheet, cached per (site, drive, item, sheet).
+    
+    Args:
+        site_id (str): The SharePoint site ID.
+        drive_id (str): The drive ID.
+        item_id (str): The workbook ID.
+        worksheet_name (str): The worksheet name, quoted as an OData key.
+        api_version (str): The Graph API version ("v1.0" or "beta").
+    
+    Returns:
+        str: The worksheet URL, without a trailing slash.
+    """
+    return (
+        f"https://graph.microsoft.com/{api_version}/sites/{site_id}/drives/{drive_id}/items/{item_id}"
+        f"/workbook/worksheets('{_quote_odata(worksheet_name)}')"
+    )
+
+
+def _no_auth(request: requests.PreparedRequest) -> requests.PreparedRequest:
+    """Auth hook that leaves the request unauthenticated, for pre-signed URLs."""
+    return request
+
+
+def _is_workbook_timeout(status: int, url: str) -> bool:
+    """
+    Tells whether a response is a workbook 504 (MaxRequestDurationExceeded).
+    
+    Those are re-sent by the callers' max_retries loop with its own backoff, so
+    the transport must not retry them as well.
+    """
+    return status == 504 and "/workbook/" in (url or "")
+
+
+class _GraphRetry(Retry):
+    """Transport retry policy that leaves workbook 504s to the calling method."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and _is_workbook_timeout(response.status, url):
+            # With raise_on_status=False urllib3 hands this response back unretried
+            raise MaxRetryError(_pool, url, "workbook request exceeded its duration")
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _evict_access_tokens(client: msal.ClientApplication, scope: List[str]) -> None:
+    """
+    Drops the cached access tokens of a client for the given scope.
+    
+    acquire_token_for_client serves a cached token until it expires, so it has to
+    be evicted for a proactive refresh to actually reach Azure AD.
+    
+    Args:
+        client (msal.ClientApplication): The MSAL client.
+        scope (List[str]): The token scope.
+    """
+    cache = client.token_cache
+    for entry in cache.find(cache.CredentialType.ACCESS_TOKEN, target=scope,
+                            query={"client_id": client.client_id}):
+        cache.remove_at(entry)
+
+
+def _acquire_graph_token(client: msal.ClientApplication, force: bool = False) -> Dict:
+    """
+    Retrieves a Graph access token using MSAL.
+    
+    Args:
+        client (msal.ClientApplication): The MSAL client.
+        force (bool): If True, bypasses the MSAL token cache.
+    
+    Returns:
+        Dict: The MSAL token result, including 'access_token' and 'expires_in'.
+    """
+    if force:
+        _evict_access_tokens(client, _GRAPH_SCOPE)
+    token_result = client.acquire_token_silent(_GRAPH_SCOPE, account=None, force_refresh=force)
+    if not token_result:
+        token_result = client.acquire_token_for_client(scopes=_GRAPH_SCOPE)
+    if "access_token" not in token_result:
+        raise Exception(f"Could not obtain access token: {token_result.get('error_description')}")
+    return token_result
+
+
+def _token_is_fresh(token_expiry: float) -> bool:
+    """Tells whether a token expiring at token_expiry is not yet due for renewal."""
+    return time.time() < token_expiry - _TOKEN_REFRESH_MARGIN
+
+
+def _is_duration_exceeded(response_text: str) -> bool:
+    """Tells whether a failed workbook call hit MaxRequestDurationExceeded, which is worth re-sending."""
+    return "MaxRequestDurationExceeded" in response_text
+
+
+def _duration_retry_wait(retry_after: str, attempt: int) -> int:
+    """Seconds to wait before re-sending a timed out workbook call: Retry-After, else 2**attempt."""
+    return int(retry_after) if retry_after.isdigit() else 2 ** attempt
+
+
+def _range_update_error(status: int, response_text: str, start: int, end: int, max_retries: int) -> Exception:
+    """Builds the exception raised when updating rows start+1 to end failed."""
+    if status == 429 or _is_duration_exceeded(response_text):
+        return Exception(f"Failed to update rows {start+1} to {end} after {max_retries} attempts.")
+    return Exception(f"Failed to update rows {start+1} to {end}: {response_text}")
+
+
+def _pivot_refresh_error(response_text: str) -> Exception:
+    """Builds the exception raised when a pivot table refresh failed."""
+    if not _is_duration_exceeded(response_text):
+        return Exception(f"Failed to refresh Pivot Table: {response_text}")
+    return Exception(f"Max retry attempts reached. The pivot table refresh could not be completed. Last error: {response_text}")
+
+
+def _print_pivot_diagnostic(status: int, body: bytes) -> None:
+    """Prints the result of listing a worksheet's pivot tables after a failed refresh."""
+    if status < 400:
+        print("Diagnostic: Pivot tables found:", _loads_json(body))
+    else:
+        print("Diagnostic: Error retrieving pivot tables:", status, body.decode("utf-8", errors="replace"))
+
+
+class _GraphIdCache:
+    """Site and drive ID caches shared by SharePointAccess and AsyncSharePointAccess."""
+
+    def __init__(self) -> None:
+        # Site and drive IDs don't change for the lifetime of the client
+        self._site_id_cache: Dict[Tuple[str, str], str] = {}
+        self._drive_cache: Dict[str, Dict[str, str]] = {}
+
+    def invalidate_cache(self) -> None:
+        """Clears the cached site and drive IDs."""
+        self._site_id_cache.clear()
+        self._drive_cache.clear()
+
+    def _store_site_id(self, cache_key: Tuple[str, str], site: Dict) -> str:
+        """
+        Caches the site ID of a site lookup response.
+        
+        Args:
+            cache_key (Tuple[str, str]): (sharepoint_domain, sharepoint_site_name)
+            site (Dict): The decoded site response.
+        
+        Returns:
+            str: The site ID.
+        """
+        site_id = site.get('id')
+        if not site_id:
+            raise Exception("Site ID not found in response.")
+        # If site ID is in format "site,abc,xyz", split and return second part.
+        site_id = site_id.split(",", 1)[1] if "," in site_id else site_id
+        self._site_id_cache[cache_key] = site_id
+        return site_id
+
+    def _store_drive_ids(self, site_id: str, drives: Dict) -> Dict[str, str]:
+        """
+        Caches the drive IDs of a drives lookup response.
+        
+        Args:
+            site_id (str): The site ID.
+            drives (Dict): The decoded drives response.
+        
+        Returns:
+            Dict[str, str]: A dictionary mapping drive names to IDs.
+        """
+        self._drive_cache[site_id] = {drive['name']: drive['id'] for drive in drives.get('value', [])}
+        return dict(self._drive_cache[site_id])
+
+
+class _AsyncGraphResponse(NamedTuple):
+    """Status, headers and body of a Graph response read by AsyncSharePointAccess."""
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+class SharePointAccess(_GraphIdCache):
     """
     Client to access SharePoint using Microsoft Graph API and MSAL.
     
@@ -33,17 +352,51 @@ class SharePointAccess:
         self._client_secret = client_secret
         self._authority = f'https://login.microsoftonline.com/{self._tenant_id}'
         
-        # Initialize persistent session for connection pooling
+        # Initialize persistent session for connection pooling, with a pool sized
+        # for concurrent Graph calls. Throttling (429 + Retry-After) and transient 5xx
+        # are retried for every method here, so the methods don't hand-roll backoff.
         self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=_GraphRetry(
+                total=_MAX_TRANSPORT_RETRIES,
+                backoff_factor=1.0,
+                backoff_jitter=0.5,
+                status_forcelist=_RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "HEAD", "PUT", "POST", "PATCH", "DELETE"]),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self._session.mount("https://graph.microsoft.com", adapter)
+        
+        super().__init__()
+        self._upload_headers_cache: Dict[str, Dict[str, str]] = {}
         
         # Date format for SharePoint dates
         self.time_format = '%Y-%m-%d %H:%M:%S'
         
-        # Create MSAL client and retrieve an access token
+        # Create MSAL client and retrieve an access token, refreshed in the background
         self.__client = self.__msla_client()
-        self.__access_token = self.__get_access_token()
-        self._headers = {'Authorization': 'Bearer ' + self.__access_token,
-                         'Content-Type': 'application/json'}
+        self._token_lock = threading.Lock()
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._access_token = ''
+        self._token_expiry = 0.0
+        self._ensure_token()
+        
+        # Default headers live on the session so calls don't merge a per-request dict;
+        # the Authorization header is attached per request from the current token.
+        self._session.headers.update({'Content-Type': 'application/json'})
+        self._session.auth = self._authorize
+
+    def close(self) -> None:
+        """Stops the background token refresh and closes the HTTP session."""
+        with self._token_lock:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+        self._session.close()
 
     # --- Setter Methods ---
     def set_client_id(self, new_client_id: str) -> None:
@@ -73,28 +426,97 @@ class SharePointAccess:
         )
         return client_msa
 
-    def __get_access_token(self) -> str:
+    def _ensure_token(self, force: bool = False) -> None:
+        """
+        Acquires a new access token when the current one is within 5 minutes of expiring.
+        
+        Args:
+            force (bool): If True, acquires a token regardless of the current expiry.
+        """
+        if not force and _token_is_fresh(self._token_expiry):
+            return
+        with self._token_lock:
+            # Another thread may have refreshed the token while we waited for the lock
+            if not force and _token_is_fresh(self._token_expiry):
+                return
+            token_result = _acquire_graph_token(self.__client, force)
+            expires_in = int(token_result.get("expires_in", 3600))
+            self._access_token = token_result["access_token"]
+            self._token_expiry = time.time() + expires_in
+            self.__schedule_token_refresh(expires_in * 0.8)
+
+    def __schedule_token_refresh(self, delay: float) -> None:
+        """
+        Starts a daemon timer that pre-fetches the access token after the given delay.
+        
+        Args:
+            delay (float): Seconds to wait before refreshing.
+        """
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(delay, self.__refresh_token_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def __refresh_token_in_background(self) -> None:
+        """Refreshes the access token from the timer thread."""
+        try:
+            self._ensure_token(force=True)
+        except Exception as e:
+            # Keep the current token; the next request retries once it nears expiry
+            print(f"Background token refresh failed: {e}")
+
+    def _authorize(self, request: requests.PreparedRequest) -> requests.PreparedRequest:
         """
-        Retrieves an access token using MSAL.
+        Session auth hook that attaches the current bearer token to each request.
+        
+        Args:
+            request (requests.PreparedRequest): The outgoing request.
+        
+        Returns:
+            requests.PreparedRequest: The request with the Authorization header set.
+        """
+        self._ensure_token()
+        request.headers['Authorization'] = 'Bearer ' + self._access_token
+        return request
+
+    # --- Helper Methods for Direct Connection ---
+    def _authed_get(self, url: str, stream: bool = False) -> requests.Response:
+        """
+        Connects to a Graph URL using the access token.
+        
+        Args:
+            url (str): The URL to connect to.
+            stream (bool): If True, the body is not read until iterated.
+        
+        Returns:
+            requests.Response: The response object.
+        """
+        return self.__connect_to_site(url, stream=stream)
+
+    def _raw_get(self, url: str, stream: bool = True) -> requests.Response:
+        """
+        Connects to a pre-signed URL (e.g. @microsoft.graph.downloadUrl) without credentials.
+        
+        Pre-signed URLs carry their own short-lived authorization, so neither the
+        bearer token nor the default JSON Content-Type are sent.
+        
+        Args:
+            url (str): The URL to connect to.
+            stream (bool): If True, the body is not read until iterated.
         
         Returns:
-            str: The access token.
+            requests.Response: The response object.
         """
-        scope = ['https://graph.microsoft.com/.default']
-        token_result = self.__client.acquire_token_silent(scope, account=None)
-        if not token_result:
-            token_result = self.__client.acquire_token_for_client(scopes=scope)
-        if "access_token" not in token_result:
-            raise Exception(f"Could not obtain access token: {token_result.get('error_description')}")
-        return token_result["access_token"]
+        return self.__connect_to_site(url, stream=stream, auth=_no_auth, headers={'Content-Type': None})
 
-    # --- Helper Method for Direct Connection ---
-    def __connect_to_site(self, url: str) -> requests.Response:
+    def __connect_to_site(self, url: str, **kwargs) -> requests.Response:
         """
-        Connects to a URL using the access token.
+        Sends a GET request and maps error statuses to exceptions.
         
         Args:
             url (str): The URL to connect to.
+            **kwargs: Extra arguments for requests.Session.get.
         
         Returns:
             requests.Response: The response object.
@@ -103,7 +525,7 @@ class SharePointAccess:
             Exception: If connection errors occur.
         """
         try:
-            response = self._session.get(url=url, headers=self._headers)
+            response = self._session.get(url=url, **kwargs)
         except requests.exceptions.ConnectionError as con_err:
             print(f"Connection error: {con_err}")
             raise Exception(f"Connection error: {con_err}")
@@ -134,13 +556,12 @@ class SharePointAccess:
         Returns:
             str: The site ID.
         """
-        url = f'https://graph.microsoft.com/v1.0/sites/{sharepoint_domain}:{sharepoint_site_name}'
-        response = self.__connect_to_site(url)
-        site_id = response.json().get('id')
-        if not site_id:
-            raise Exception("Site ID not found in response.")
-        # If site ID is in format "site,abc,xyz", split and return second part.
-        return site_id.split(",", 1)[1] if "," in site_id else site_id
+        cache_key = (sharepoint_domain, sharepoint_site_name)
+        if cache_key in self._site_id_cache:
+            return self._site_id_cache[cache_key]
+
+        url = _SITE_ID_URL.format(domain=sharepoint_domain, site=sharepoint_site_name)
+        return self._store_site_id(cache_key, _decode_json(self._authed_get(url)))
 
     def get_drive_id(self, site_id: str) -> Dict[str, str]:
         """
@@ -152,11 +573,102 @@ class SharePointAccess:
         Returns:
             Dict[str, str]: A dictionary mapping drive names to IDs.
         """
-        url = f'https://graph.microsoft.com/v1.0/sites/{site_id}/drives'
-        response = self.__connect_to_site(url)
-        drives = response.json().get('value', [])
-        return {drive['name']: drive['id'] for drive in drives}
-    
+        if site_id in self._drive_cache:
+            return dict(self._drive_cache[site_id])
+
+        url = _DRIVES_URL.format(site=site_id)
+        return self._store_drive_ids(site_id, _decode_json(self._authed_get(url)))
+
+    def get_site_and_drive_ids(self, sharepoint_domain: str, sharepoint_site_name: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Retrieves the site ID and its drive IDs in a single batched round-trip.
+        
+        The drives are addressed through the site path, so both lookups can be
+        sent together instead of waiting for the site ID first.
+        
+        Args:
+            sharepoint_domain (str): The SharePoint domain.
+            sharepoint_site_name (str): The site name.
+        
+        Returns:
+            Tuple[str, Dict[str, str]]: (site_id, {drive_name: drive_id})
+        """
+        cache_key = (sharepoint_domain, sharepoint_site_name)
+        site_id = self._site_id_cache.get(cache_key)
+        if site_id and site_id in self._drive_cache:
+            return site_id, dict(self._drive_cache[site_id])
+
+        responses = self._graph_batch([
+            {"id": "site", "method": "GET",
+             "url": _SITE_ID_PATH.format(domain=sharepoint_domain, site=sharepoint_site_name)},
+            {"id": "drives", "method": "GET",
+             "url": _DRIVES_PATH.format(site=f"{sharepoint_domain}:{sharepoint_site_name}:")},
+        ])
+        for request_id in ("site", "drives"):
+            status = responses[request_id].get("status")
+            if status != 200:
+                raise Exception(f"Failed to retrieve {request_id}: {status}, {responses[request_id].get('body')}")
+
+        site_id = self._store_site_id(cache_key, responses["site"].get("body", {}))
+        return site_id, self._store_drive_ids(site_id, responses["drives"].get("body", {}))
+
+    def _graph_batch(self, sub_requests: List[Dict], max_retries: int = 3) -> Dict[str, Dict]:
+        """
+        Sends Graph subrequests through the JSON $batch endpoint.
+        
+        Subrequests are packed in groups of 20 (the Graph limit). Subresponses
+        throttled with 429 or failed with MaxRequestDurationExceeded are re-issued
+        in a later batch after honoring their Retry-After header, like the
+        max_retries loop of the single-request methods; every other status is
+        returned to the caller as is.
+        
+        Args:
+            sub_requests (List[Dict]): Subrequests with 'id', 'method', 'url' (relative
+                to /v1.0) and optional 'body' and 'headers'.
+            max_retries (int): Maximum number of batches sent for retried subrequests.
+        
+        Returns:
+            Dict[str, Dict]: Subresponses keyed by subrequest id.
+        
+        Raises:
+            Exception: If a batch call fails or throttled subrequests exhaust the retries.
+        """
+        pending = []
+        for sub_request in sub_requests:
+            sub_request = dict(sub_request)
+            if "body" in sub_request:
+                sub_request["headers"] = {"Content-Type": "application/json", **sub_request.get("headers", {})}
+            pending.append(sub_request)
+
+        responses: Dict[str, Dict] = {}
+        for attempt in range(max_retries):
+            throttled, wait_time = [], 0
+            for i in range(0, len(pending), _BATCH_LIMIT):
+                chunk = pending[i:i + _BATCH_LIMIT]
+                response = self._session.post(
+                    url=_BATCH_URL,
+                    data=_encode_json({"requests": chunk})
+                )
+                if not response.ok:
+                    raise Exception(f"Batch request failed: {response.status_code}, {response.text}")
+                by_id = {sub_request["id"]: sub_request for sub_request in chunk}
+                for sub_response in _decode_json(response).get("responses", []):
+                    if (sub_response.get("status") == 429
+                            or _graph_error_code(sub_response.get("body")) == "MaxRequestDurationExceeded"):
+                        throttled.append(by_id[sub_response["id"]])
+                        retry_after = sub_response.get("headers", {}).get("Retry-After", "")
+                        wait_time = max(wait_time, int(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                    else:
+                        responses[sub_response["id"]] = sub_response
+            if not throttled:
+                return responses
+            pending = throttled
+            if attempt + 1 < max_retries:
+                print(f"{len(pending)} batched requests throttled (attempt {attempt+1}/{max_retries}). Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+
+        raise Exception(f"Batched requests still throttled after {max_retries} attempts: {[r['id'] for r in pending]}")
+
     def set_range_number_format(self, site_id: str, drive_id: str, item_id: str, 
                             raw_data_sheet_name: str, range_address: str, 
                             number_format: str) -> None:
@@ -171,16 +683,15 @@ class SharePointAccess:
             range_address: Excel range (e.g., "A:A")
             number_format: Excel format code (e.g., "@" for text)
         """
-        format_endpoint = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-            f"/workbook/worksheets('{raw_data_sheet_name}')/range(address='{range_address}')/format"
-        )
+        format_endpoint = _WS_RANGE_URL.format(
+            site=site_id, drive=drive_id, item=item_id,
+            sheet=_quote_odata(raw_data_sheet_name), addr=_escape_odata(range_address)
+        ) + "/format"
 
         print(f"Setting format '{number_format}' for range '{range_address}'...")
         
         response = self._session.patch(
             url=format_endpoint,
-            headers=self._headers,  # Use the same headers that work for clear
             json={
                 "numberFormat": {
                     "format": number_format
@@ -193,6 +704,39 @@ class SharePointAccess:
         else:
             raise Exception(f"Format update failed: {response.status_code}, {response.text}")
 
+    def set_range_number_formats(self, site_id: str, drive_id: str, item_id: str,
+                                 raw_data_sheet_name: str, range_formats: List[Tuple[str, str]]) -> None:
+        """
+        Sets number formats for several ranges of a worksheet using batched requests.
+        
+        Args:
+            site_id: SharePoint site ID
+            drive_id: Drive ID (document library)
+            item_id: File ID (workbook)
+            raw_data_sheet_name: Worksheet name
+            range_formats: List of (range_address, number_format) tuples
+        """
+        sheet = _quote_odata(raw_data_sheet_name)
+        sub_requests = [
+            {
+                "id": str(i),
+                "method": "PATCH",
+                "url": _WS_RANGE_PATH.format(
+                    site=site_id, drive=drive_id, item=item_id,
+                    sheet=sheet, addr=_escape_odata(range_address)
+                ) + "/format",
+                "body": {"numberFormat": {"format": number_format}}
+            }
+            for i, (range_address, number_format) in enumerate(range_formats)
+        ]
+        print(f"Setting formats for {len(sub_requests)} ranges...")
+        responses = self._graph_batch(sub_requests)
+        for i, (range_address, _) in enumerate(range_formats):
+            sub_response = responses[str(i)]
+            if sub_response.get("status") != 200:
+                raise Exception(f"Format update failed for range '{range_address}': {sub_response.get('status')}, {sub_response.get('body')}")
+        print("Formats updated successfully.")
+
     def get_directory_list(
         self,
         sharepoint_domain: str,
@@ -212,53 +756,82 @@ class SharePointAccess:
         Returns:
             Tuple[List[Dict], List[Dict]]: (folders, files)
         """
-        site_id = self.get_site_id(sharepoint_domain, sharepoint_site_name)
-        drive_dict = self.get_drive_id(site_id)
+        site_id, drive_dict = self.get_site_and_drive_ids(sharepoint_domain, sharepoint_site_name)
         drive_id = drive_dict.get(sub_drive_name)
         if not drive_id:
             raise Exception(f"Drive '{sub_drive_name}' not found.")
         
-        url = f'https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/root:/{sharepoint_path}:/children'
-        response = self.__connect_to_site(url)
+        url = (
+            f'https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/root:/{sharepoint_path}:/children'
+            '?$top=999&$select=id,name,folder,file,createdDateTime,webUrl,@microsoft.graph.downloadUrl'
+        )
 
         folder_list, file_list = [], []
-        for item in response.json().get('value', []):
-            if 'folder' in item:
-                folder_list.append({
-                    'id': item['id'], 
-                    'name': item['name'], 
-                    'type': "Folder",
-                    'createdDateTime': item['createdDateTime'].replace('T', ' ').replace("Z", ''),
-                    'webUrl': item['webUrl']
-                })
-            elif 'file' in item:
-                file_list.append({
-                    'id': item['id'], 
-                    'name': item['name'],
-                    'type': "File", 
-                    'createdDateTime': item['createdDateTime'].replace('T', ' ').replace("Z", ''),
-                    'downloadUrl': item.get('@microsoft.graph.downloadUrl')
-                })
+        # Follow @odata.nextLink so folders larger than one page are listed in full
+        while url:
+            page = _decode_json(self._authed_get(url))
+            for item in page.get('value', []):
+                if 'folder' in item:
+                    parsed_date = _parse_graph_datetime(item['createdDateTime'])
+                    folder_list.append({
+                        'id': item['id'], 
+                        'name': item['name'], 
+                        'type': "Folder",
+                        'createdDateTime': parsed_date.strftime(self.time_format),
+                        'webUrl': item['webUrl'],
+                        'parsedDateTime': parsed_date
+                    })
+                elif 'file' in item:
+                    parsed_date = _parse_graph_datetime(item['createdDateTime'])
+                    file_list.append({
+                        'id': item['id'], 
+                        'name': item['name'],
+                        'type': "File", 
+                        'createdDateTime': parsed_date.strftime(self.time_format),
+                        'downloadUrl': item.get('@microsoft.graph.downloadUrl'),
+                        'parsedDateTime': parsed_date
+                    })
+            url = page.get('@odata.nextLink')
         return folder_list, file_list
 
+    def map_paths(self, paths: List[Tuple[str, str, str, str]]) -> List[Tuple[List[Dict], List[Dict]]]:
+        """
+        Retrieves the directory listings of several SharePoint paths concurrently.
+        
+        Args:
+            paths (List[Tuple[str, str, str, str]]): (sharepoint_domain, sharepoint_site_name,
+                sub_drive_name, sharepoint_path) tuples, as taken by get_directory_list.
+        
+        Returns:
+            List[Tuple[List[Dict], List[Dict]]]: (folders, files) for each path, in input order.
+        """
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            return list(executor.map(lambda path: self.get_directory_list(*path), paths))
+
     def download_file_in_dbfs(self, file_name: str, download_url: str, dbfs_temp_folder: str = "/dbfs/") -> str:
         """
         Downloads a file from SharePoint and saves it to DBFS.
         
         Args:
             file_name (str): The file name.
-            download_url (str): The URL to download the file.
+            download_url (str): The pre-signed URL to download the file (e.g. 'downloadUrl' from get_directory_list),
+                or a Graph URL such as '.../items/{id}/content'.
             dbfs_temp_folder (str): The target folder path.
         
         Returns:
             str: The full DBFS path where the file was saved.
         """
-        response = self.__connect_to_site(download_url)
+        # Graph URLs need the bearer token; pre-signed URLs on other hosts reject it
+        if urllib.parse.urlsplit(download_url).hostname == "graph.microsoft.com":
+            response = self._authed_get(download_url, stream=True)
+        else:
+            response = self._raw_get(download_url, stream=True)
         os.makedirs(dbfs_temp_folder, exist_ok=True)
         dbfs_path = os.path.join(dbfs_temp_folder, file_name)
         try:
-            with open(dbfs_path, "wb") as file:
-                file.write(response.content)
+            with response, open(dbfs_path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
             print(f"File '{file_name}' saved successfully to {dbfs_temp_folder}.")
         except Exception as e:
             print(f"Error saving file '{file_name}': {e}")
@@ -286,16 +859,19 @@ class SharePointAccess:
         Returns:
             Dict: Metadata of the most recent file.
         """
-        _, file_list = self.get_directory_list(sharepoint_domain, sharepoint_site_name, sub_drive_name, sharepoint_path)
-        if not file_list:
+        item = self.__most_recent_child(sharepoint_domain, sharepoint_site_name, sub_drive_name, sharepoint_path, 'file')
+        if not item:
             raise Exception("No files found in the directory.")
         
-        # Convert createdDateTime to datetime objects for sorting.
-        for item in file_list:
-            item['parsedDateTime'] = datetime.strptime(item['createdDateTime'], self.time_format)
-        file_list.sort(key=lambda x: x['parsedDateTime'])
-        most_recent = file_list[-1]
-        most_recent['createdDateTime'] = most_recent['parsedDateTime'].strftime(self.time_format)
+        parsed_date = _parse_graph_datetime(item['createdDateTime'])
+        most_recent = {
+            'id': item['id'],
+            'name': item['name'],
+            'type': "File",
+            'createdDateTime': parsed_date.strftime(self.time_format),
+            'downloadUrl': item.get('@microsoft.graph.downloadUrl'),
+            'parsedDateTime': parsed_date
+        }
         
         if flag_download:
             self.download_file_in_dbfs(file_name=most_recent['name'], download_url=most_recent['downloadUrl'])
@@ -320,15 +896,72 @@ class SharePointAccess:
         Returns:
             Dict: Metadata of the most recent folder.
         """
-        folder_list, _ = self.get_directory_list(sharepoint_domain, sharepoint_site_name, sub_drive_name, sharepoint_path)
-        if not folder_list:
+        item = self.__most_recent_child(sharepoint_domain, sharepoint_site_name, sub_drive_name, sharepoint_path, 'folder')
+        if not item:
             raise Exception("No folders found in the directory.")
-        for item in folder_list:
-            item['parsedDateTime'] = datetime.strptime(item['createdDateTime'], self.time_format)
-        folder_list.sort(key=lambda x: x['parsedDateTime'])
-        most_recent = folder_list[-1]
-        most_recent['createdDateTime'] = most_recent['parsedDateTime'].strftime(self.time_format)
-        return most_recent
+        parsed_date = _parse_graph_datetime(item['createdDateTime'])
+        return {
+            'id': item['id'],
+            'name': item['name'],
+            'type': "Folder",
+            'createdDateTime': parsed_date.strftime(self.time_format),
+            'webUrl': item.get('webUrl'),
+            'parsedDateTime': parsed_date
+        }
+
+    def __most_recent_child(
+        self,
+        sharepoint_domain: str,
+        sharepoint_site_name: str,
+        sub_drive_name: str,
+        sharepoint_path: str,
+        facet: str
+    ) -> Optional[Dict]:
+        """
+        Retrieves the most recently created child of a directory, sorted server-side.
+        
+        List-children does not support $filter, so children are requested newest
+        first and the facet is picked client-side, usually from the first page.
+        Drives that reject $orderby (400) are listed in full and compared client-side.
+        
+        Args:
+            sharepoint_domain (str): The SharePoint domain.
+            sharepoint_site_name (str): The site name.
+            sub_drive_name (str): The drive name.
+            sharepoint_path (str): The directory path.
+            facet (str): 'file' or 'folder', the kind of child to look for.
+        
+        Returns:
+            Optional[Dict]: The raw Graph item, or None if the directory has no such child.
+        """
+        site_id, drive_dict = self.get_site_and_drive_ids(sharepoint_domain, sharepoint_site_name)
+        drive_id = drive_dict.get(sub_drive_name)
+        if not drive_id:
+            raise Exception(f"Drive '{sub_drive_name}' not found.")
+        
+        children_url = (
+            f'https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/root:/{sharepoint_path}:/children'
+            '?$top=999&$select=id,name,folder,file,createdDateTime,webUrl,@microsoft.graph.downloadUrl'
+        )
+        try:
+            page = _decode_json(self._authed_get(f'{children_url}&$orderby=createdDateTime desc'))
+            ordered = True
+        except Exception as e:
+            if str(e) != "Bad Request":
+                raise
+            page = _decode_json(self._authed_get(children_url))
+            ordered = False
+
+        newest = None
+        while True:
+            for item in page.get('value', []):
+                if facet in item and (newest is None or _parse_graph_datetime(item['createdDateTime'])
+                                      > _parse_graph_datetime(newest['createdDateTime'])):
+                    newest = item
+            next_link = page.get('@odata.nextLink')
+            if not next_link or (ordered and newest is not None):
+                return newest
+            page = _decode_json(self._authed_get(next_link))
 
     def delete_file(self, file_object: Dict, sharepoint_domain: str, sharepoint_site_name: str, sub_drive_name: str, sharepoint_path: str) -> None:
         """
@@ -341,8 +974,7 @@ class SharePointAccess:
             sub_drive_name (str): The drive name.
             sharepoint_path (str): The directory path.
         """
-        site_id = self.get_site_id(sharepoint_domain, sharepoint_site_name)
-        drive_dict = self.get_drive_id(site_id)
+        site_id, drive_dict = self.get_site_and_drive_ids(sharepoint_domain, sharepoint_site_name)
         drive_id = drive_dict.get(sub_drive_name)
         if not drive_id:
             raise Exception(f"Drive '{sub_drive_name}' not found.")
@@ -350,24 +982,34 @@ class SharePointAccess:
         file_name = file_object.get("name")
         file_id = file_object.get("id")
         delete_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{file_id}"
-        response = self._session.delete(url= delete_endpoint,
-                                        headers=self._headers)
+        response = self._session.delete(url= delete_endpoint)
         if response.status_code in [200, 204]:
             print(f"Existing file '{file_name}' deleted successfully.")
         else:
             raise Exception(f"Failed to delete existing file: {response.text}")
 
-    def wait_for_file(self, site_id: str, drive_id: str, folder_path: str, file_name: str, timeout: int = 60, poll_interval: int = 3) -> Dict:
+    def wait_for_file(self, site_id: str, drive_id: str, folder_path: str, file_name: str, timeout: int = 60,
+                      poll_interval: int = 3, max_interval: int = 30, use_delta: bool = True) -> Dict:
         """
         Waits until a specific file is available in SharePoint.
         
+        After an initial check by path, the drive's delta feed is followed so each
+        check only transfers the changes since the previous one; the file path is
+        checked again only once a change with the file's name shows up. Falls back
+        to checking the path on every tick when delta queries are unavailable.
+        
+        Checks back off exponentially with jitter, starting at poll_interval and
+        capped at max_interval; a Retry-After header from Graph takes precedence.
+        
         Args:
             site_id (str): The SharePoint site ID.
             drive_id (str): The drive ID.
             folder_path (str): The folder path.
             file_name (str): The file name.
             timeout (int): Maximum seconds to wait.
-            poll_interval (int): Seconds between checks.
+            poll_interval (int): Seconds before the first re-check.
+            max_interval (int): Maximum seconds between checks.
+            use_delta (bool): If False, always checks the file path instead of the delta feed.
         
         Returns:
             Dict: Metadata of the file.
@@ -375,67 +1017,215 @@ class SharePointAccess:
         file_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root:/{folder_path}/{file_name}"
         print(f"Waiting for file '{file_name}'...")
         start_time = time.time()
-        while time.time() - start_time < timeout:
+        
+        # Checkpoint the delta feed before the first path check so no change is missed
+        delta_link = None
+        if use_delta:
             try:
-                response = self._session.get(url=file_endpoint,
-                                            headers=self._headers)
-                if response.ok:
-                    data = response.json()
-                    print(f"File '{file_name}' is now available.")
-                    return {
-                        "id": data.get("id"),
-                        "name": data.get("name"),
-                        "createdDateTime": data.get("createdDateTime", "").replace("T", " ").replace("Z", ""),
-                        "webUrl": data.get("webUrl")
-                    }
+                delta_link = self.get_delta_link(site_id, drive_id)
             except Exception as e:
-                print(f"File not available yet: {e}")
-            time.sleep(poll_interval)
+                print(f"Delta query unavailable, polling the file path instead: {e}")
+        check_path = True
+        
+        delay = min(poll_interval, max_interval)
+        # HEAD avoids transferring the item body on every miss; fall back to GET if unsupported
+        probe_method = "HEAD"
+        while time.time() - start_time < timeout:
+            wait_time = delay
+            if delta_link and not check_path:
+                try:
+                    changes, delta_link = self.get_drive_changes(delta_link)
+                    check_path = any(item.get("name") == file_name and "deleted" not in item for item in changes)
+                except Exception as e:
+                    print(f"Delta query failed, polling the file path instead: {e}")
+                    delta_link = None
+            if check_path or not delta_link:
+                try:
+                    response = self._session.request(probe_method, url=file_endpoint)
+                    if response.status_code == 405 and probe_method == "HEAD":
+                        probe_method = "GET"
+                        continue
+                    if response.ok and probe_method == "HEAD":
+                        response = self._session.get(url=file_endpoint)
+                    if response.ok:
+                        data = _decode_json(response)
+                        print(f"File '{file_name}' is now available.")
+                        return {
+                            "id": data.get("id"),
+                            "name": data.get("name"),
+                            "createdDateTime": data.get("createdDateTime", "").replace("T", " ").replace("Z", ""),
+                            "webUrl": data.get("webUrl")
+                        }
+                    # Only a definitive miss hands over to the delta feed; keep probing after errors
+                    if response.status_code == 404:
+                        check_path = False
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        wait_time = int(retry_after)
+                except Exception as e:
+                    print(f"File not available yet: {e}")
+            time.sleep(max(0, min(wait_time, timeout - (time.time() - start_time))))
+            delay = min(max_interval, delay * 1.5 + random.uniform(0, 0.25 * delay))
         raise Exception(f"Timeout waiting for file '{file_name}' in '{folder_path}'.")
 
-    def download_file_content(self, site_id: str, drive_id: str, folder_path: str, file_name: str) -> bytes:
+    def get_delta_link(self, site_id: str, drive_id: str) -> str:
         """
-        Downloads the content of a file from SharePoint.
+        Retrieves a delta link for the drive's current state, without enumerating it.
         
         Args:
             site_id (str): The SharePoint site ID.
             drive_id (str): The drive ID.
-            folder_path (str): The folder path.
-            file_name (str): The file name.
         
         Returns:
-            bytes: The file content.
+            str: The @odata.deltaLink to pass to get_drive_changes.
         """
-        file_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root:/{folder_path}/{file_name}"
-        print(f"Retrieving metadata for file '{file_name}'")
-        response = self._session.get(url = file_endpoint, 
-                                     headers=self._headers)
-        if not response.ok:
-            raise Exception(f"Failed to locate file '{file_name}': {response.text}")
-        item_id = response.json().get("id")
-        download_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}/content"
-        download_resp = self._session.get(url=download_endpoint,
-                                          headers=self._headers)
-        if not download_resp.ok:
-            raise Exception(f"Failed to download file '{file_name}': {download_resp.text}")
-        return download_resp.content
+        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root/delta?token=latest&$select=id,name,deleted"
+        delta_link = _decode_json(self._authed_get(url)).get("@odata.deltaLink")
+        if not delta_link:
+            raise Exception("Delta link not found in response.")
+        return delta_link
 
-    def upload_new_file(self, site_id: str, drive_id: str, folder_path: str, new_file_name: str, file_data: bytes) -> None:
+    def get_drive_changes(self, delta_link: str) -> Tuple[List[Dict], str]:
         """
-        Uploads a new file to SharePoint.
+        Retrieves the drive items changed since a delta link was issued.
         
         Args:
-            site_id (str): The SharePoint site ID.
-            drive_id (str): The drive ID.
-            folder_path (str): The target folder path.
-            new_file_name (str): The new file name.
-            file_data (bytes): The file content.
+            delta_link (str): A delta link from get_delta_link or a previous call.
+        
+        Returns:
+            Tuple[List[Dict], str]: (changed items, new delta link)
+        
+        Raises:
+            Exception: If a page fails, e.g. 410 resyncRequired once the delta link expires.
         """
-        upload_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/root:/{folder_path}/{new_file_name}:/content"
-        print(f"Uploading file '{new_file_name}'...")
-        response = self._session.put(url = upload_endpoint,
-                                     headers=self._headers,
-                                     data=file_data)
+        changes = []
+        url = delta_link
+        while True:
+            response = self._authed_get(url)
+            if not response.ok:
+                raise Exception(f"Failed to retrieve drive changes: {response.status_code}, {response.text}")
+            page = _decode_json(response)
+            changes.extend(page.get("value", []))
+            if "@odata.nextLink" not in page:
+                return changes, page.get("@odata.deltaLink", delta_link)
+            url = page["@odata.nextLink"]
+
+    def create_drive_subscription(self, drive_id: str, notification_url: str, expiration_minutes: int = 1440,
+                                  client_state: Optional[str] = None) -> Dict:
+        """
+        Subscribes a webhook to change notifications for a drive.
+        
+        Graph validates notification_url when the subscription is created, so the
+        listener must already be reachable. Drive subscriptions last at most
+        42300 minutes and must be renewed before they expire.
+        
+        Args:
+            drive_id (str): The drive ID.
+            notification_url (str): The HTTPS endpoint that receives notifications.
+            expiration_minutes (int): Minutes until the subscription expires.
+            client_state (Optional[str]): Secret echoed back in each notification.
+        
+        Returns:
+            Dict: The created subscription.
+        """
+        expiration = datetime.now(timezone.utc) + timedelta(minutes=expiration_minutes)
+        body = {
+            "changeType": "updated",
+            "notificationUrl": notification_url,
+            "resource": f"/drives/{drive_id}/root",
+            "expirationDateTime": expiration.strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
+        if client_state:
+            body["clientState"] = client_state
+        response = self._session.post(url="https://graph.microsoft.com/v1.0/subscriptions", json=body)
+        if response.status_code != 201:
+            raise Exception(f"Failed to create subscription: {response.status_code}, {response.text}")
+        return _decode_json(response)
+
+    def delete_subscription(self, subscription_id: str) -> None:
+        """
+        Deletes a change notification subscription.
+        
+        Args:
+            subscription_id (str): The subscription ID.
+        """
+        response = self._session.delete(url=f"https://graph.microsoft.com/v1.0/subscriptions/{subscription_id}")
+        if response.status_code not in [200, 204]:
+            raise Exception(f"Failed to delete subscription: {response.status_code}, {response.text}")
+
+    def download_file_content(self, site_id: str, drive_id: str, folder_path: str, file_name: str) -> bytes:
+        """
+        Downloads the content of a file from SharePoint.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            folder_path (str): The folder path.
+            file_name (str): The file name.
+        
+        Returns:
+            bytes: The file content.
+        """
+        return self.__get_file_content(site_id, drive_id, folder_path, file_name).content
+
+    def iter_file_content(self, site_id: str, drive_id: str, folder_path: str, file_name: str,
+                          chunk_size: int = _DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Streams the content of a file from SharePoint without buffering it whole.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            folder_path (str): The folder path.
+            file_name (str): The file name.
+            chunk_size (int): Maximum bytes per yielded chunk.
+        
+        Yields:
+            bytes: Consecutive chunks of the file content.
+        """
+        with self.__get_file_content(site_id, drive_id, folder_path, file_name, stream=True) as response:
+            yield from response.iter_content(chunk_size=chunk_size)
+
+    def __get_file_content(self, site_id: str, drive_id: str, folder_path: str, file_name: str,
+                           stream: bool = False) -> requests.Response:
+        """
+        Requests a file's content by path in a single call.
+        
+        Graph answers with a redirect to a pre-signed download URL, which requests
+        follows without forwarding the Authorization header to the other host.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            folder_path (str): The folder path.
+            file_name (str): The file name.
+            stream (bool): If True, the body is not read until iterated.
+        
+        Returns:
+            requests.Response: The content response.
+        """
+        content_endpoint = _CONTENT_URL.format(site=site_id, drive=drive_id, folder=folder_path, file=file_name)
+        print(f"Downloading file '{file_name}'")
+        response = self._session.get(url=content_endpoint, stream=stream, allow_redirects=True)
+        if not response.ok:
+            raise Exception(f"Failed to download file '{file_name}': {response.text}")
+        return response
+
+    def upload_new_file(self, site_id: str, drive_id: str, folder_path: str, new_file_name: str, file_data: bytes) -> None:
+        """
+        Uploads a new file to SharePoint.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            folder_path (str): The target folder path.
+            new_file_name (str): The new file name.
+            file_data (bytes): The file content.
+        """
+        upload_endpoint = _CONTENT_URL.format(site=site_id, drive=drive_id, folder=folder_path, file=new_file_name)
+        print(f"Uploading file '{new_file_name}'...")
+        response = self._session.put(url = upload_endpoint,
+                                     data=file_data)
         if response.status_code not in [200, 201]:
             raise Exception(f"Failed to upload file '{new_file_name}': {response.text}")
         print(f"File '{new_file_name}' uploaded successfully.")
@@ -451,103 +1241,147 @@ class SharePointAccess:
             raw_data_sheet_name (str): The worksheet name.
             clear_range (str): The cell range to clear.
         """
-        clear_endpoint = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-            f"/workbook/worksheets('{raw_data_sheet_name}')/range(address='{clear_range}')/clear"
-        )
+        clear_endpoint = _WS_RANGE_URL.format(
+            site=site_id, drive=drive_id, item=item_id,
+            sheet=_quote_odata(raw_data_sheet_name), addr=_escape_odata(clear_range)
+        ) + "/clear"
         print(f"Clearing range '{clear_range}' in worksheet '{raw_data_sheet_name}'...")
-        response = self._session.post(url = clear_endpoint,
-                                      headers=self._headers)
+        response = self._session.post(url = clear_endpoint)
         if response.status_code in [200, 204]:
             print("Sheet cleared successfully (keeping headers).")
         else:
             raise Exception(f"Failed to clear sheet: {response.status_code}, {response.text}")
+
+    def clear_worksheet_ranges(self, site_id: str, drive_id: str, item_id: str, raw_data_sheet_name: str, clear_ranges: List[str]) -> None:
+        """
+        Clears several ranges in an Excel worksheet using batched requests.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            item_id (str): The Excel file ID.
+            raw_data_sheet_name (str): The worksheet name.
+            clear_ranges (List[str]): The cell ranges to clear.
+        """
+        sheet = _quote_odata(raw_data_sheet_name)
+        sub_requests = [
+            {
+                "id": str(i),
+                "method": "POST",
+                "url": _WS_RANGE_PATH.format(
+                    site=site_id, drive=drive_id, item=item_id,
+                    sheet=sheet, addr=_escape_odata(clear_range)
+                ) + "/clear",
+                "body": {}
+            }
+            for i, clear_range in enumerate(clear_ranges)
+        ]
+        print(f"Clearing {len(sub_requests)} ranges in worksheet '{raw_data_sheet_name}'...")
+        responses = self._graph_batch(sub_requests)
+        for i, clear_range in enumerate(clear_ranges):
+            sub_response = responses[str(i)]
+            if sub_response.get("status") not in [200, 204]:
+                raise Exception(f"Failed to clear range '{clear_range}': {sub_response.get('status')}, {sub_response.get('body')}")
+        print("Ranges cleared successfully.")
     
+    def __send_with_duration_retry(self, method: str, url: str, max_retries: int, **kwargs) -> requests.Response:
+        """
+        Sends a request, re-issuing it while Graph reports MaxRequestDurationExceeded.
+        
+        Throttling and transient 5xx responses, including their backoff, are
+        retried by the session adapter; this only covers the workbook-level timeout,
+        which the adapter leaves alone so max_retries is the total number of attempts.
+        
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL.
+            max_retries (int): Maximum number of attempts.
+            **kwargs: Extra arguments for requests.Session.request.
+        
+        Returns:
+            requests.Response: The last response received.
+        """
+        for attempt in range(max_retries):
+            response = self._session.request(method, url=url, **kwargs)
+            if response.ok or not _is_duration_exceeded(response.text):
+                return response
+            if attempt + 1 < max_retries:
+                wait_time = _duration_retry_wait(response.headers.get("Retry-After", ""), attempt)
+                print(f"Request timed out (attempt {attempt+1}/{max_retries}). Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+        return response
+
     def update_range_data(self, site_id: str, drive_id: str, new_item_id: str, raw_data_sheet_name: str, 
                       update_range: str, chunk_data: list, start: int, end: int, max_retries: int = 3) -> bool:
-        update_endpoint = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{new_item_id}"
-            f"/workbook/worksheets('{raw_data_sheet_name}')/range(address='{update_range}')"
+        update_endpoint = _WS_RANGE_URL.format(
+            site=site_id, drive=drive_id, item=new_item_id,
+            sheet=_quote_odata(raw_data_sheet_name), addr=_escape_odata(update_range)
         )
-        updated_body = {"values": chunk_data}
+        # Encode once; retries resend the same bytes
+        updated_body = _encode_json({"values": chunk_data})
         
-        for attempt in range(max_retries):
-            response = self._session.patch(
-                url=update_endpoint,
-                headers=self._headers,
-                json=updated_body
-            )
-            if response.ok:
-                print(f"Successfully updated rows {start+1} to {end}.")
-                return True  # Return True upon successful update
-            else:
-                if response.status_code == 429 or "MaxRequestDurationExceeded" in response.text:
-                    retry_after = response.headers.get("Retry-After")
-                    # Use the server's suggested wait time if provided; otherwise, use exponential backoff.
-                    wait_time = int(retry_after) if retry_after and retry_after.isdigit() else (2 ** attempt)
-                    print(f"Request timed out (attempt {attempt+1}/{max_retries}). Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    raise Exception(f"Failed to update rows {start+1} to {end}: {response.text}")
+        response = self.__send_with_duration_retry("PATCH", update_endpoint, max_retries, data=updated_body)
+        if response.ok:
+            print(f"Successfully updated rows {start+1} to {end}.")
+            return True  # Return True upon successful update
+        raise _range_update_error(response.status_code, response.text, start, end, max_retries)
+
+    def update_ranges_data(self, site_id: str, drive_id: str, new_item_id: str, raw_data_sheet_name: str,
+                           range_updates: List[Tuple[str, list]], max_retries: int = 3) -> bool:
+        """
+        Updates several ranges of a worksheet using batched PATCH requests.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            new_item_id (str): The Excel file ID.
+            raw_data_sheet_name (str): The worksheet name.
+            range_updates (List[Tuple[str, list]]): List of (update_range, chunk_data) tuples.
+            max_retries (int): Maximum number of batches sent for throttled or timed out updates.
         
-        raise Exception(f"Failed to update rows {start+1} to {end} after {max_retries} attempts.")
+        Returns:
+            bool: True when every range was updated.
+        """
+        sheet = _quote_odata(raw_data_sheet_name)
+        sub_requests = [
+            {
+                "id": str(i),
+                "method": "PATCH",
+                "url": _WS_RANGE_PATH.format(
+                    site=site_id, drive=drive_id, item=new_item_id,
+                    sheet=sheet, addr=_escape_odata(update_range)
+                ),
+                "body": {"values": chunk_data}
+            }
+            for i, (update_range, chunk_data) in enumerate(range_updates)
+        ]
+        responses = self._graph_batch(sub_requests, max_retries=max_retries)
+        for i, (update_range, _) in enumerate(range_updates):
+            sub_response = responses[str(i)]
+            if sub_response.get("status") != 200:
+                raise Exception(f"Failed to update range '{update_range}': {sub_response.get('status')}, {sub_response.get('body')}")
+        print(f"Successfully updated {len(range_updates)} ranges.")
+        return True
 
 
     def refresh_pivot_table(self, site_id: str, drive_id: str, item_id: str,
                             pivot_table_sheet: str, max_retries: int = 3) -> None:
-        # Codificar el nombre de la hoja para manejar espacios y caracteres especiales
-        encoded_sheet_name = urllib.parse.quote(pivot_table_sheet)
-        
-        refresh_pivot_endpoint = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-            f"/workbook/worksheets('{encoded_sheet_name}')/pivotTables/refreshAll"
-        )
+        # URL de la hoja (nombre codificado para manejar espacios y caracteres especiales)
+        worksheet_url = _worksheet_url(site_id, drive_id, item_id, pivot_table_sheet)
+        refresh_pivot_endpoint = f"{worksheet_url}/pivotTables/refreshAll"
         
-        retry_count = 0
-        last_refresh_error = None
+        refresh_resp = self.__send_with_duration_retry("POST", refresh_pivot_endpoint, max_retries)
+        if refresh_resp.ok:
+            print("Pivot Table refreshed successfully.")
+            return
+        last_refresh_error = refresh_resp.text
 
-        while retry_count < max_retries:
-            refresh_resp = self._session.post(url=refresh_pivot_endpoint, headers=self._headers)
-            if refresh_resp.ok:
-                print("Pivot Table refreshed successfully.")
-                return
-            else:
-                response_text = refresh_resp.text
-                last_refresh_error = response_text
-                # Si el error es por tiempo excedido, reintentar
-                if "MaxRequestDurationExceeded" in response_text:
-                    retry_count += 1
-                    wait_time = 2 ** retry_count  # backoff exponencial
-                    print(f"Timeout error occurred. Retrying in {wait_time} seconds (attempt {retry_count}/{max_retries})...")
-                    time.sleep(wait_time)
-                else:
-                    # Si es otro error, intenta obtener información de diagnóstico de las pivot tables
-                    pivot_tables_endpoint = (
-                        f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-                        f"/workbook/worksheets('{encoded_sheet_name}')/pivotTables"
-                    )
-                    diagnostic_resp = self._session.get(url=pivot_tables_endpoint, headers=self._headers)
-                    if diagnostic_resp.ok:
-                        pivot_tables = diagnostic_resp.json()
-                        print("Diagnostic: Pivot tables found:", pivot_tables)
-                    else:
-                        print("Diagnostic: Error retrieving pivot tables:", diagnostic_resp.status_code, diagnostic_resp.text)
-                    raise Exception(f"Failed to refresh Pivot Table: {response_text}")
-
-        # Después de alcanzar el máximo de reintentos, se intenta obtener las pivot tables para diagnóstico.
-        print("Max retry attempts reached. Attempting to retrieve pivot tables for troubleshooting...")
-        pivot_tables_endpoint = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-            f"/workbook/worksheets('{encoded_sheet_name}')/pivotTables"
-        )
-        diagnostic_resp = self._session.get(url=pivot_tables_endpoint, headers=self._headers)
-        if diagnostic_resp.ok:
-            pivot_tables = diagnostic_resp.json()
-            print("Diagnostic: Pivot tables found:", pivot_tables)
-        else:
-            print("Diagnostic: Error retrieving pivot tables:", diagnostic_resp.status_code, diagnostic_resp.text)
-        
-        raise Exception(f"Max retry attempts reached. The pivot table refresh could not be completed. Last error: {last_refresh_error}")
+        # Se intenta obtener las pivot tables para diagnóstico.
+        if _is_duration_exceeded(last_refresh_error):
+            print("Max retry attempts reached. Attempting to retrieve pivot tables for troubleshooting...")
+        diagnostic_resp = self._session.get(url=f"{worksheet_url}/pivotTables")
+        _print_pivot_diagnostic(diagnostic_resp.status_code, diagnostic_resp.content)
+        raise _pivot_refresh_error(last_refresh_error)
 
     def refresh_individual_pivot_table(self, site_id: str, drive_id: str, item_id: str,
                                     worksheet_name: str, pivot_table_name: str,
@@ -566,46 +1400,22 @@ class SharePointAccess:
         Raises:
             Exception: Si no se puede refrescar la pivot table luego de los reintentos.
         """
-        # Codificar nombres para la URL
-        encoded_worksheet_name = urllib.parse.quote(worksheet_name)
-        encoded_pivot_name = urllib.parse.quote(pivot_table_name)
+        # Endpoint para refrescar una pivot table específica (beta), con nombres codificados
+        worksheet_url = _worksheet_url(site_id, drive_id, item_id, worksheet_name, api_version="beta")
+        endpoint = f"{worksheet_url}/pivotTables('{_quote_odata(pivot_table_name)}')/refresh"
         
-        # Endpoint para refrescar una pivot table específica (beta)
-        endpoint = (
-            f"https://graph.microsoft.com/beta/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-            f"/workbook/worksheets('{encoded_worksheet_name}')/pivotTables('{encoded_pivot_name}')/refresh"
-        )
-        
-        retry_count = 0
-        last_refresh_error = None
-
-        while retry_count < max_retries:
-            refresh_resp = self._session.post(url=endpoint, headers=self._headers)
-            if refresh_resp.ok:
-                print("Pivot Table refreshed successfully.")
-                return
-            else:
-                response_text = refresh_resp.text
-                last_refresh_error = response_text
-                # Si el error es por tiempo excedido, se reintenta con backoff exponencial
-                if "MaxRequestDurationExceeded" in response_text:
-                    retry_count += 1
-                    wait_time = 2 ** retry_count
-                    print(f"Timeout error occurred. Retrying in {wait_time} seconds (attempt {retry_count}/{max_retries})...")
-                    time.sleep(wait_time)
-                else:
-                    print("Error refreshing pivot table:", response_text)
-                    raise Exception(f"Failed to refresh Pivot Table: {response_text}")
-        
-        raise Exception(f"Max retry attempts reached. The pivot table refresh could not be completed. Last error: {last_refresh_error}")
+        refresh_resp = self.__send_with_duration_retry("POST", endpoint, max_retries)
+        if refresh_resp.ok:
+            print("Pivot Table refreshed successfully.")
+            return
+        last_refresh_error = refresh_resp.text
+        if not _is_duration_exceeded(last_refresh_error):
+            print("Error refreshing pivot table:", last_refresh_error)
+        raise _pivot_refresh_error(last_refresh_error)
 
     def list_pivot_tables(self, site_id: str, drive_id: str, item_id: str, worksheet_name: str) -> dict:
-        encoded_sheet_name = urllib.parse.quote(worksheet_name)
-        endpoint = (
-            f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/{item_id}"
-            f"/workbook/worksheets('{encoded_sheet_name}')/pivotTables"
-        )
-        response = self._session.get(url=endpoint, headers=self._headers)
+        endpoint = f"{_worksheet_url(site_id, drive_id, item_id, worksheet_name)}/pivotTables"
+        response = self._session.get(url=endpoint)
         if response.ok:
             return response.json()
         else:
@@ -634,19 +1444,488 @@ class SharePointAccess:
             file_name (str): The target file name.
             content_type (str): The MIME type of the file.
         """
-        site_id = self.get_site_id(sharepoint_domain, sharepoint_site_name)
-        drive_dict = self.get_drive_id(site_id)
+        site_id, drive_dict = self.get_site_and_drive_ids(sharepoint_domain, sharepoint_site_name)
         drive_id = drive_dict.get(sharepoint_sub_drive)
         if not drive_id:
             raise Exception(f"Drive '{sharepoint_sub_drive}' not found.")
         
-        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/root:/{sharepoint_path}/{file_name}:/content"
+        item_endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives/{drive_id}/items/root:/{sharepoint_path}/{file_name}"
+        file_size = os.path.getsize(dbfs_path)
+        if file_size > _SIMPLE_UPLOAD_LIMIT:
+            self.__upload_in_chunks(item_endpoint, dbfs_path, file_size)
+            print("File written successfully to SharePoint.")
+            return
+
+        # Passing the open file lets requests stream it instead of buffering it first
         with open(dbfs_path, 'rb') as file:
-            file_content = file.read()
-        headers = self._headers.copy()
-        headers["Content-Type"] = content_type
-        response = self._session.put(url, headers=headers, data=file_content)
+            response = self._session.put(f"{item_endpoint}:/content", headers=self.__upload_headers(content_type), data=file)
         if response.status_code not in [200, 201]:
             raise Exception(f"File upload failed: {response.text}")
         print("File written successfully to SharePoint.")
+
+    def __upload_headers(self, content_type: str) -> Dict[str, str]:
+        """
+        Returns the per-request headers for an upload of the given MIME type.
+        
+        Only Content-Type is overridden; Authorization comes from the session auth
+        hook, so cached entries stay valid across token refreshes.
         
+        Args:
+            content_type (str): The MIME type of the file.
+        
+        Returns:
+            Dict[str, str]: The headers to pass to the upload call.
+        """
+        headers = self._upload_headers_cache.get(content_type)
+        if headers is None:
+            headers = self._upload_headers_cache[content_type] = {"Content-Type": content_type}
+        return headers
+
+    def __upload_in_chunks(self, item_endpoint: str, dbfs_path: str, file_size: int) -> None:
+        """
+        Uploads a large file through a Graph resumable upload session.
+        
+        Args:
+            item_endpoint (str): The Graph URL of the target item, addressed by path.
+            dbfs_path (str): The local DBFS file path.
+            file_size (int): The file size in bytes.
+        
+        Raises:
+            Exception: If the upload session cannot be created, a chunk fails, the file
+                changes size during the upload or the last chunk does not complete it.
+        """
+        session_resp = self._session.post(
+            url=f"{item_endpoint}:/createUploadSession",
+            json={"item": {"@microsoft.graph.conflictBehavior": "replace"}}
+        )
+        if not session_resp.ok:
+            raise Exception(f"Failed to create upload session: {session_resp.status_code}, {session_resp.text}")
+        upload_url = _decode_json(session_resp)["uploadUrl"]
+
+        # The upload URL is pre-authenticated and rejects the bearer token
+        with open(dbfs_path, 'rb') as file:
+            offset = 0
+            while offset < file_size:
+                chunk = file.read(min(_UPLOAD_CHUNK_SIZE, file_size - offset))
+                if not chunk:
+                    self._session.delete(url=upload_url, auth=_no_auth)
+                    raise Exception(f"File '{dbfs_path}' shrank during upload: read {offset} of {file_size} bytes.")
+                end = offset + len(chunk) - 1
+                response = self._session.put(
+                    url=upload_url,
+                    headers={"Content-Range": f"bytes {offset}-{end}/{file_size}", "Content-Type": None},
+                    data=chunk,
+                    auth=_no_auth
+                )
+                # Graph answers 202 while bytes are missing and 200/201 once the item is created
+                expected = [200, 201] if end + 1 == file_size else [202]
+                if response.status_code not in expected:
+                    self._session.delete(url=upload_url, auth=_no_auth)
+                    raise Exception(f"File upload failed at bytes {offset}-{end}: {response.status_code}, {response.text}")
+                print(f"Uploaded bytes {offset}-{end} of {file_size}.")
+                offset = end + 1
+
+
+class AsyncSharePointAccess(_GraphIdCache):
+    """
+    asyncio client to access SharePoint using Microsoft Graph API and MSAL.
+    
+    Mirrors the site lookup, Excel range, pivot refresh and file transfer
+    methods of SharePointAccess with async methods, so many Graph calls can run
+    concurrently without threads. Requires the optional aiohttp package.
+    
+    A single aiohttp connector is shared for the lifetime of the instance; use
+    `async with AsyncSharePointAccess(...) as sp:` or call close() when done.
+    """
+    
+    def __init__(self, client_id: str, tenant_id: str, client_secret: str, max_connections: int = 64):
+        """
+        Initializes the asynchronous SharePoint client.
+        
+        Args:
+            client_id (str): Cluster client ID.
+            tenant_id (str): Cluster tenant ID.
+            client_secret (str): Cluster secret client.
+            max_connections (int): Maximum simultaneous connections of the shared connector.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncSharePointAccess requires the 'aiohttp' package.")
+        self._client_id = client_id
+        self._tenant_id = tenant_id
+        self._client_secret = client_secret
+        self._authority = f'https://login.microsoftonline.com/{self._tenant_id}'
+        self._max_connections = max_connections
+        
+        # The aiohttp session must be created inside the running event loop, see open()
+        self._session: Optional[aiohttp.ClientSession] = None
+        super().__init__()
+        
+        # MSAL client; tokens are acquired in open() and refreshed by a background task
+        self.__client = msal.ConfidentialClientApplication(
+            client_id=self._client_id,
+            client_credential=self._client_secret,
+            authority=self._authority
+        )
+        self._token_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._access_token = ''
+        self._token_expiry = 0.0
+        self._refresh_in = 0.0
+
+    async def __aenter__(self) -> "AsyncSharePointAccess":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Creates the shared HTTP session and starts the background token refresh."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._max_connections, ttl_dns_cache=600)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  headers={'Content-Type': 'application/json'})
+        await self._ensure_token()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.__refresh_token_loop())
+
+    async def close(self) -> None:
+        """Stops the background token refresh and closes the shared HTTP session."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # --- MSAL Authentication Methods ---
+    async def _ensure_token(self, force: bool = False) -> None:
+        """
+        Acquires a new access token when the current one is within 5 minutes of expiring.
+        
+        MSAL is blocking, so the acquisition runs in the default executor.
+        
+        Args:
+            force (bool): If True, acquires a token regardless of the current expiry.
+        """
+        if not force and _token_is_fresh(self._token_expiry):
+            return
+        async with self._token_lock:
+            # Another task may have refreshed the token while we waited for the lock
+            if not force and _token_is_fresh(self._token_expiry):
+                return
+            token_result = await asyncio.get_running_loop().run_in_executor(None, _acquire_graph_token, self.__client, force)
+            expires_in = int(token_result.get("expires_in", 3600))
+            self._access_token = token_result["access_token"]
+            self._token_expiry = time.time() + expires_in
+            self._refresh_in = expires_in * 0.8
+
+    async def __refresh_token_loop(self) -> None:
+        """Pre-fetches the access token at 80% of its lifetime until closed."""
+        while True:
+            await asyncio.sleep(self._refresh_in)
+            try:
+                await self._ensure_token(force=True)
+            except Exception as e:
+                # Keep the current token; the next request retries once it nears expiry
+                print(f"Background token refresh failed: {e}")
+                await asyncio.sleep(60)
+
+    # --- Helper Method for Graph Requests ---
+    async def _request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                       **kwargs) -> _AsyncGraphResponse:
+        """
+        Sends an authenticated Graph request and reads its body.
+        
+        Throttling and transient 5xx responses are retried with exponential backoff
+        and jitter, honoring Retry-After, like the adapter of SharePointAccess.
+        Workbook 504s are returned as is, for __send_with_duration_retry.
+        
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL.
+            headers (Optional[Dict[str, str]]): Extra headers for this request.
+            **kwargs: Extra arguments for aiohttp.ClientSession.request.
+        
+        Returns:
+            _AsyncGraphResponse: The status, headers and body of the response.
+        
+        Raises:
+            Exception: If connection errors occur.
+        """
+        if self._session is None or self._session.closed:
+            await self.open()
+        await self._ensure_token()
+        request_headers = {'Authorization': 'Bearer ' + self._access_token, **(headers or {})}
+        for attempt in range(_MAX_TRANSPORT_RETRIES + 1):
+            try:
+                # The connection is released when the block exits, so the body is read inside it
+                async with self._session.request(method, url, headers=request_headers, **kwargs) as raw:
+                    response = _AsyncGraphResponse(raw.status, raw.headers, await raw.read())
+            except aiohttp.ClientError as con_err:
+                print(f"Connection error: {con_err}")
+                raise Exception(f"Connection error: {con_err}")
+            if (response.status not in _RETRY_STATUSES or attempt == _MAX_TRANSPORT_RETRIES
+                    or _is_workbook_timeout(response.status, url)):
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            wait_time = int(retry_after) if retry_after.isdigit() else 2 ** attempt + random.uniform(0, 0.5)
+            await asyncio.sleep(wait_time)
+        return response
+
+    async def __send_with_duration_retry(self, method: str, url: str, max_retries: int,
+                                         **kwargs) -> _AsyncGraphResponse:
+        """
+        Sends a request, re-issuing it while Graph reports MaxRequestDurationExceeded.
+        
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL.
+            max_retries (int): Maximum number of attempts.
+            **kwargs: Extra arguments for _request.
+        
+        Returns:
+            _AsyncGraphResponse: The last response received.
+        """
+        for attempt in range(max_retries):
+            response = await self._request(method, url, **kwargs)
+            if response.ok or not _is_duration_exceeded(response.text):
+                return response
+            if attempt + 1 < max_retries:
+                wait_time = _duration_retry_wait(response.headers.get("Retry-After", ""), attempt)
+                print(f"Request timed out (attempt {attempt+1}/{max_retries}). Retrying in {wait_time} seconds...")
+                await asyncio.sleep(wait_time)
+        return response
+
+    # --- SharePoint Methods ---
+    async def get_site_id(self, sharepoint_domain: str, sharepoint_site_name: str) -> str:
+        """
+        Retrieves the SharePoint site ID.
+        
+        Args:
+            sharepoint_domain (str): The SharePoint domain.
+            sharepoint_site_name (str): The site name.
+        
+        Returns:
+            str: The site ID.
+        """
+        cache_key = (sharepoint_domain, sharepoint_site_name)
+        if cache_key in self._site_id_cache:
+            return self._site_id_cache[cache_key]
+
+        url = _SITE_ID_URL.format(domain=sharepoint_domain, site=sharepoint_site_name)
+        response = await self._request("GET", url)
+        if not response.ok:
+            raise Exception(f"Failed to retrieve site: {response.status}, {response.text}")
+        return self._store_site_id(cache_key, _loads_json(response.body))
+
+    async def get_drive_id(self, site_id: str) -> Dict[str, str]:
+        """
+        Retrieves drive IDs for the given SharePoint site.
+        
+        Args:
+            site_id (str): The site ID.
+        
+        Returns:
+            Dict[str, str]: A dictionary mapping drive names to IDs.
+        """
+        if site_id in self._drive_cache:
+            return dict(self._drive_cache[site_id])
+
+        response = await self._request("GET", _DRIVES_URL.format(site=site_id))
+        if not response.ok:
+            raise Exception(f"Failed to retrieve drives: {response.status}, {response.text}")
+        return self._store_drive_ids(site_id, _loads_json(response.body))
+
+    async def set_range_number_format(self, site_id: str, drive_id: str, item_id: str,
+                                      raw_data_sheet_name: str, range_address: str,
+                                      number_format: str) -> None:
+        """
+        Sets number format for a specific range in an Excel worksheet.
+        
+        Args:
+            site_id: SharePoint site ID
+            drive_id: Drive ID (document library)
+            item_id: File ID (workbook)
+            raw_data_sheet_name: Worksheet name
+            range_address: Excel range (e.g., "A:A")
+            number_format: Excel format code (e.g., "@" for text)
+        """
+        format_endpoint = _WS_RANGE_URL.format(
+            site=site_id, drive=drive_id, item=item_id,
+            sheet=_quote_odata(raw_data_sheet_name), addr=_escape_odata(range_address)
+        ) + "/format"
+        print(f"Setting format '{number_format}' for range '{range_address}'...")
+        response = await self._request("PATCH", format_endpoint,
+                                       data=_encode_json({"numberFormat": {"format": number_format}}))
+        if response.status == 200:
+            print("Format updated successfully.")
+        else:
+            raise Exception(f"Format update failed: {response.status}, {response.text}")
+
+    async def clear_worksheet_range(self, site_id: str, drive_id: str, item_id: str, raw_data_sheet_name: str, clear_range: str) -> None:
+        """
+        Clears a specific range in an Excel worksheet stored on SharePoint.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            item_id (str): The Excel file ID.
+            raw_data_sheet_name (str): The worksheet name.
+            clear_range (str): The cell range to clear.
+        """
+        clear_endpoint = _WS_RANGE_URL.format(
+            site=site_id, drive=drive_id, item=item_id,
+            sheet=_quote_odata(raw_data_sheet_name), addr=_escape_odata(clear_range)
+        ) + "/clear"
+        print(f"Clearing range '{clear_range}' in worksheet '{raw_data_sheet_name}'...")
+        response = await self._request("POST", clear_endpoint)
+        if response.status in [200, 204]:
+            print("Sheet cleared successfully (keeping headers).")
+        else:
+            raise Exception(f"Failed to clear sheet: {response.status}, {response.text}")
+
+    async def update_range_data(self, site_id: str, drive_id: str, new_item_id: str, raw_data_sheet_name: str,
+                                update_range: str, chunk_data: list, start: int, end: int, max_retries: int = 3) -> bool:
+        """
+        Updates a range of an Excel worksheet with the given rows.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            new_item_id (str): The Excel file ID.
+            raw_data_sheet_name (str): The worksheet name.
+            update_range (str): The cell range to update.
+            chunk_data (list): The rows to write.
+            start (int): Index of the first row, for progress messages.
+            end (int): Index after the last row, for progress messages.
+            max_retries (int): Maximum attempts while Graph reports MaxRequestDurationExceeded.
+        
+        Returns:
+            bool: True upon successful update.
+        """
+        update_endpoint = _WS_RANGE_URL.format(
+            site=site_id, drive=drive_id, item=new_item_id,
+            sheet=_quote_odata(raw_data_sheet_name), addr=_escape_odata(update_range)
+        )
+        response = await self.__send_with_duration_retry(
+            "PATCH", update_endpoint, max_retries, data=_encode_json({"values": chunk_data})
+        )
+        if response.ok:
+            print(f"Successfully updated rows {start+1} to {end}.")
+            return True
+        raise _range_update_error(response.status, response.text, start, end, max_retries)
+
+    async def update_ranges_data(self, site_id: str, drive_id: str, new_item_id: str, raw_data_sheet_name: str,
+                                 range_updates: List[Tuple[str, list]], max_retries: int = 3) -> bool:
+        """
+        Updates several ranges of a worksheet concurrently.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            new_item_id (str): The Excel file ID.
+            raw_data_sheet_name (str): The worksheet name.
+            range_updates (List[Tuple[str, list]]): List of (update_range, chunk_data) tuples.
+            max_retries (int): Maximum attempts per range while Graph reports MaxRequestDurationExceeded.
+        
+        Returns:
+            bool: True when every range was updated.
+        """
+        start = 0
+        updates = []
+        for update_range, chunk_data in range_updates:
+            updates.append(self.update_range_data(site_id, drive_id, new_item_id, raw_data_sheet_name,
+                                                  update_range, chunk_data, start, start + len(chunk_data),
+                                                  max_retries=max_retries))
+            start += len(chunk_data)
+        await asyncio.gather(*updates)
+        return True
+
+    async def refresh_pivot_table(self, site_id: str, drive_id: str, item_id: str,
+                                  pivot_table_sheet: str, max_retries: int = 3) -> None:
+        """
+        Refreshes every pivot table of a worksheet.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            item_id (str): The workbook ID.
+            pivot_table_sheet (str): The worksheet holding the pivot tables.
+            max_retries (int): Maximum attempts while Graph reports MaxRequestDurationExceeded.
+        """
+        worksheet_url = _worksheet_url(site_id, drive_id, item_id, pivot_table_sheet)
+        refresh_pivot_endpoint = f"{worksheet_url}/pivotTables/refreshAll"
+        refresh_resp = await self.__send_with_duration_retry("POST", refresh_pivot_endpoint, max_retries)
+        if refresh_resp.ok:
+            print("Pivot Table refreshed successfully.")
+            return
+        last_refresh_error = refresh_resp.text
+        if _is_duration_exceeded(last_refresh_error):
+            print("Max retry attempts reached. Attempting to retrieve pivot tables for troubleshooting...")
+        diagnostic_resp = await self._request("GET", f"{worksheet_url}/pivotTables")
+        _print_pivot_diagnostic(diagnostic_resp.status, diagnostic_resp.body)
+        raise _pivot_refresh_error(last_refresh_error)
+
+    async def refresh_individual_pivot_table(self, site_id: str, drive_id: str, item_id: str,
+                                             worksheet_name: str, pivot_table_name: str,
+                                             max_retries: int = 3) -> None:
+        """
+        Refreshes a single pivot table of a worksheet using the Graph beta endpoint.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            item_id (str): The workbook ID.
+            worksheet_name (str): The worksheet holding the pivot table.
+            pivot_table_name (str): The name (or ID) of the pivot table.
+            max_retries (int): Maximum attempts while Graph reports MaxRequestDurationExceeded.
+        """
+        worksheet_url = _worksheet_url(site_id, drive_id, item_id, worksheet_name, api_version="beta")
+        endpoint = f"{worksheet_url}/pivotTables('{_quote_odata(pivot_table_name)}')/refresh"
+        refresh_resp = await self.__send_with_duration_retry("POST", endpoint, max_retries)
+        if refresh_resp.ok:
+            print("Pivot Table refreshed successfully.")
+            return
+        last_refresh_error = refresh_resp.text
+        if not _is_duration_exceeded(last_refresh_error):
+            print("Error refreshing pivot table:", last_refresh_error)
+        raise _pivot_refresh_error(last_refresh_error)
+
+    async def upload_new_file(self, site_id: str, drive_id: str, folder_path: str, new_file_name: str, file_data: bytes) -> None:
+        """
+        Uploads a new file to SharePoint.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            folder_path (str): The target folder path.
+            new_file_name (str): The new file name.
+            file_data (bytes): The file content.
+        """
+        upload_endpoint = _CONTENT_URL.format(site=site_id, drive=drive_id, folder=folder_path, file=new_file_name)
+        print(f"Uploading file '{new_file_name}'...")
+        response = await self._request("PUT", upload_endpoint, data=file_data)
+        if response.status not in [200, 201]:
+            raise Exception(f"Failed to upload file '{new_file_name}': {response.text}")
+        print(f"File '{new_file_name}' uploaded successfully.")
+
+    async def download_file_content(self, site_id: str, drive_id: str, folder_path: str, file_name: str) -> bytes:
+        """
+        Downloads the content of a file from SharePoint.
+        
+        Args:
+            site_id (str): The SharePoint site ID.
+            drive_id (str): The drive ID.
+            folder_path (str): The folder path.
+            file_name (str): The file name.
+        
+        Returns:
+            bytes: The file content.
+        """
+        content_endpoint = _CONTENT_URL.format(site=site_id, drive=drive_id, folder=folder_path, file=file_name)
+        print(f"Downloading file '{file_name}'")
+        response = await self._request("GET", content_endpoint)
+        if not response.ok:
+            raise Exception(f"Failed to download file '{file_name}': {response.text}")
+        return response.body
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import sharepoint_class  # noqa: E402
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+
+class _LocalGraphSession:
+    """Sends the client's Graph requests to the local test server instead."""
+
+    def __init__(self, session, base_url):
+        self._session = session
+        self._base_url = base_url
+        self.requests = []
+
+    @property
+    def closed(self):
+        return self._session.closed
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs.get("headers", {}).get("Authorization")))
+        return self._session.request(method, url.replace("https://graph.microsoft.com", self._base_url), **kwargs)
+
+    async def close(self):
+        await self._session.close()
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncSharePointAccessTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pivot_refreshes = 0
+        app = web.Application()
+        app.router.add_get("/v1.0/sites/{site:[^/]+:/sites/[^/]+}", self._site)
+        app.router.add_get("/v1.0/sites/{site}/drives", self._drives)
+        app.router.add_get("/v1.0/sites/{site}/drives/{drive}/root:/{path:.*}:/content", self._content)
+        app.router.add_post("/{version}/sites/{site}/drives/{drive}/items/{item}/workbook/{path:.*}", self._refresh)
+        app.router.add_get("/{version}/sites/{site}/drives/{drive}/items/{item}/workbook/{path:.*}/pivotTables",
+                           self._pivot_tables)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        with mock.patch.object(sharepoint_class.msal, "ConfidentialClientApplication"):
+            self.sp = sharepoint_class.AsyncSharePointAccess("client", "tenant", "secret")
+        self.sp._access_token = "TOKEN"
+        self.sp._token_expiry = time.time() + 3600
+        self.graph = _LocalGraphSession(sharepoint_class.aiohttp.ClientSession(), f"http://127.0.0.1:{port}")
+        self.sp._session = self.graph
+
+    async def asyncTearDown(self):
+        await self.sp.close()
+        await self.runner.cleanup()
+
+    async def _site(self, request):
+        return web.json_response({"id": "contoso.sharepoint.com,site-guid,web-guid"})
+
+    async def _drives(self, request):
+        return web.json_response({"value": [{"name": "Documents", "id": "drive-1"}]})
+
+    async def _content(self, request):
+        if request.match_info["path"].endswith("missing.csv"):
+            return web.json_response({"error": {"code": "itemNotFound"}}, status=404)
+        return web.Response(body=b"a,b\n1,2\n")
+
+    async def _refresh(self, request):
+        self.pivot_refreshes += 1
+        return web.json_response({"error": {"code": "MaxRequestDurationExceeded"}}, status=504)
+
+    async def _pivot_tables(self, request):
+        return web.json_response({"value": [{"name": "PivotTable1"}]})
+
+    async def test_site_and_drive_ids_are_read_and_cached(self):
+        site_id = await self.sp.get_site_id("contoso.sharepoint.com", "/sites/finance")
+        drives = await self.sp.get_drive_id(site_id)
+        await self.sp.get_site_id("contoso.sharepoint.com", "/sites/finance")
+
+        self.assertEqual(site_id, "site-guid,web-guid")
+        self.assertEqual(drives, {"Documents": "drive-1"})
+        self.assertEqual(len(self.graph.requests), 2)
+        self.assertTrue(all(auth == "Bearer TOKEN" for _, _, auth in self.graph.requests))
+
+    async def test_download_file_content_returns_body(self):
+        content = await self.sp.download_file_content("site", "drive-1", "reports", "data.csv")
+        self.assertEqual(content, b"a,b\n1,2\n")
+
+    async def test_download_error_reports_response_text(self):
+        with self.assertRaisesRegex(Exception, "itemNotFound"):
+            await self.sp.download_file_content("site", "drive-1", "reports", "missing.csv")
+
+    async def test_workbook_timeout_is_sent_max_retries_times(self):
+        with mock.patch.object(sharepoint_class.asyncio, "sleep", mock.AsyncMock()) as sleep:
+            with self.assertRaisesRegex(Exception, "Max retry attempts reached"):
+                await self.sp.refresh_pivot_table("site", "drive-1", "item", "Pivot", max_retries=3)
+
+        self.assertEqual(self.pivot_refreshes, 3)
+        self.assertEqual([call.args[0] for call in sleep.await_args_list], [1, 2])
+        # Like the sync client, the failure is followed by a diagnostic listing of the pivot tables
+        self.assertEqual(self.graph.requests[-1][:2],
+                         ("GET", sharepoint_class._worksheet_url("site", "drive-1", "item", "Pivot") + "/pivotTables"))
+
+
+if __name__ == "__main__":
+    unittest.main()
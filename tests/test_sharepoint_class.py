@@ -0,0 +1,313 @@
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "core"))
+
+import sharepoint_class  # noqa: E402
+
+_GRAPH = "https://graph.microsoft.com"
+
+
+class _LocalGraphAdapter(BaseAdapter):
+    """Sends Graph requests to the local test server through the client's own adapter."""
+
+    def __init__(self, adapter, base_url):
+        super().__init__()
+        self._adapter = adapter
+        self._base_url = base_url
+
+    def send(self, request, **kwargs):
+        request.url = request.url.replace(_GRAPH, self._base_url, 1)
+        return self._adapter.send(request, **kwargs)
+
+    def close(self):
+        self._adapter.close()
+
+
+class _GraphHandler(http.server.BaseHTTPRequestHandler):
+
+    def _respond(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.command, self.path, dict(self.headers), body))
+        status, headers, payload = self.server.respond(self.command, self.path, self.headers, body)
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class SharePointAccessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _GraphHandler)
+        self.server.requests = []
+        self.server.respond = self.respond
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.routes = []
+
+        with mock.patch.object(sharepoint_class.msal, "ConfidentialClientApplication") as client:
+            client.return_value.acquire_token_silent.return_value = {"access_token": "TOKEN", "expires_in": 3600}
+            self.sp = sharepoint_class.SharePointAccess("client", "tenant", "secret")
+        adapter = self.sp._session.get_adapter(_GRAPH)
+        self.sp._session.mount(_GRAPH, _LocalGraphAdapter(adapter, self.base_url))
+
+        # Backoff sleeps (ours and urllib3's) are recorded instead of waited
+        sleep = mock.patch.object(sharepoint_class.time, "sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def tearDown(self):
+        self.sp.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def route(self, method, path_part, handler):
+        """Registers handler(path, headers, body) -> (status, headers, payload) for matching requests."""
+        self.routes.append((method, path_part, handler))
+
+    def respond(self, method, path, headers, body):
+        for route_method, path_part, handler in self.routes:
+            if route_method == method and path_part in path:
+                return handler(path, headers, body)
+        return 404, {}, {"error": {"code": "itemNotFound"}}
+
+    def requests_to(self, path_part, method=None):
+        return [r for r in self.server.requests if path_part in r[1] and method in (None, r[0])]
+
+    def serve_site(self):
+        """Serves the batched site and drive lookup of site 'site-1' with drive 'Documents'."""
+        bodies = {"site": {"id": "contoso.sharepoint.com,site-1,web-1"},
+                  "drives": {"value": [{"name": "Documents", "id": "drive-1"}]}}
+        self.route("POST", "/$batch", lambda path, headers, body: (200, {}, {"responses": [
+            {"id": r["id"], "status": 200, "body": bodies[r["id"]]} for r in json.loads(body)["requests"]
+        ]}))
+
+    # --- $batch ---
+    def test_batch_maps_subresponses_by_id_across_chunks(self):
+        def batch(path, headers, body):
+            sub_requests = json.loads(body)["requests"]
+            # Graph does not keep the subrequest order in its response
+            return 200, {}, {"responses": [
+                {"id": r["id"], "status": 200, "body": {"url": r["url"]}} for r in reversed(sub_requests)
+            ]}
+        self.route("POST", "/$batch", batch)
+
+        responses = self.sp._graph_batch([{"id": f"r{i}", "method": "GET", "url": f"/items/{i}"} for i in range(25)])
+
+        self.assertEqual(len(self.requests_to("/$batch")), 2)
+        self.assertEqual({k: v["body"]["url"] for k, v in responses.items()},
+                         {f"r{i}": f"/items/{i}" for i in range(25)})
+
+    def test_batch_requeues_throttled_and_timed_out_subrequests(self):
+        sent = []
+
+        def batch(path, headers, body):
+            sub_requests = json.loads(body)["requests"]
+            sent.append(sorted(r["id"] for r in sub_requests))
+            responses = []
+            for r in sub_requests:
+                if len(sent) == 1 and r["id"] == "a":
+                    responses.append({"id": "a", "status": 429, "headers": {"Retry-After": "7"}})
+                elif len(sent) == 1 and r["id"] == "b":
+                    responses.append({"id": "b", "status": 504,
+                                      "body": {"error": {"code": "MaxRequestDurationExceeded"}}})
+                else:
+                    responses.append({"id": r["id"], "status": 200, "body": {}})
+            return 200, {}, {"responses": responses}
+        self.route("POST", "/$batch", batch)
+
+        responses = self.sp._graph_batch([{"id": i, "method": "PATCH", "url": "/x", "body": {}} for i in "abc"])
+
+        self.assertEqual(sent, [["a", "b", "c"], ["a", "b"]])
+        self.assertEqual({k: v["status"] for k, v in responses.items()}, {"a": 200, "b": 200, "c": 200})
+        self.sleep.assert_called_once_with(7)
+
+    def test_batch_raises_without_sleeping_after_the_last_attempt(self):
+        self.route("POST", "/$batch", lambda path, headers, body: (200, {}, {"responses": [
+            {"id": r["id"], "status": 429} for r in json.loads(body)["requests"]
+        ]}))
+
+        with self.assertRaisesRegex(Exception, "still throttled after 3 attempts"):
+            self.sp._graph_batch([{"id": "a", "method": "GET", "url": "/x"}], max_retries=3)
+
+        self.assertEqual(len(self.requests_to("/$batch")), 3)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1, 2])
+
+    # --- Transport retries ---
+    def test_adapter_leaves_workbook_timeouts_to_the_caller(self):
+        self.route("POST", "/workbook/", lambda *args: (504, {}, {"error": {"code": "MaxRequestDurationExceeded"}}))
+
+        response = self.sp._session.post(f"{_GRAPH}/v1.0/drives/d/items/i/workbook/refreshSession")
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(len(self.requests_to("/workbook/")), 1)
+
+    def test_adapter_retries_transient_errors(self):
+        self.route("POST", "/items", lambda *args: (503, {}, {}))
+
+        response = self.sp._session.post(f"{_GRAPH}/v1.0/drives/d/items/i/copy")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.requests_to("/items")), sharepoint_class._MAX_TRANSPORT_RETRIES + 1)
+
+    def test_pivot_refresh_sends_max_retries_requests(self):
+        self.route("POST", "/refreshAll", lambda *args: (504, {}, {"error": {"code": "MaxRequestDurationExceeded"}}))
+        self.route("GET", "/pivotTables", lambda *args: (200, {}, {"value": []}))
+
+        with self.assertRaisesRegex(Exception, "Max retry attempts reached"):
+            self.sp.refresh_pivot_table("site-1", "drive-1", "item-1", "Pivot", max_retries=3)
+
+        self.assertEqual(len(self.requests_to("/refreshAll")), 3)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1, 2])
+
+    # --- Most recent child ---
+    def test_most_recent_file_is_picked_from_the_sorted_page(self):
+        self.serve_site()
+        self.route("GET", "/children", lambda *args: (200, {}, {"value": [
+            {"id": "2", "name": "new-folder", "folder": {}, "createdDateTime": "2024-03-01T00:00:00Z"},
+            {"id": "1", "name": "new.csv", "file": {}, "createdDateTime": "2024-02-01T00:00:00.5Z",
+             "@microsoft.graph.downloadUrl": "https://download.example/new.csv"},
+            {"id": "0", "name": "old.csv", "file": {}, "createdDateTime": "2024-01-01T00:00:00Z"},
+        ], "@odata.nextLink": f"{_GRAPH}/v1.0/next"}))
+
+        item = self.sp.get_most_recent_file("contoso.sharepoint.com", "/sites/finance", "Documents", "reports")
+
+        self.assertEqual((item["name"], item["downloadUrl"]), ("new.csv", "https://download.example/new.csv"))
+        children = self.requests_to("/children")
+        self.assertEqual(len(children), 1)
+        self.assertIn("$orderby=createdDateTime%20desc", children[0][1])
+        self.assertNotIn("$filter", children[0][1])
+
+    def test_most_recent_folder_falls_back_to_the_full_listing(self):
+        self.serve_site()
+
+        def children(path, headers, body):
+            if "orderby" in path:
+                return 400, {}, {"error": {"code": "invalidRequest"}}
+            return 200, {}, {"value": [
+                {"id": "1", "name": "2024-01", "folder": {}, "createdDateTime": "2024-01-01T00:00:00Z"},
+            ], "@odata.nextLink": f"{_GRAPH}/v1.0/next"}
+        self.route("GET", "/children", children)
+        self.route("GET", "/next", lambda *args: (200, {}, {"value": [
+            {"id": "2", "name": "2024-02", "folder": {}, "createdDateTime": "2024-02-01T00:00:00Z"},
+            {"id": "3", "name": "later.csv", "file": {}, "createdDateTime": "2024-03-01T00:00:00Z"},
+        ]}))
+
+        item = self.sp.get_most_recent_folder("contoso.sharepoint.com", "Documents", "/sites/finance", "reports")
+
+        self.assertEqual(item["name"], "2024-02")
+
+    # --- Downloads ---
+    def download(self, url):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = self.sp.download_file_in_dbfs("data.csv", url, directory.name)
+        with open(path, "rb") as file:
+            return file.read()
+
+    def test_download_sends_the_bearer_token_to_graph_urls(self):
+        self.route("GET", "/items/1/content", lambda *args: (200, {}, b"a,b\n"))
+
+        self.assertEqual(self.download(f"{_GRAPH}/v1.0/drives/d/items/1/content"), b"a,b\n")
+        self.assertEqual(self.requests_to("/items/1/content")[0][2].get("Authorization"), "Bearer TOKEN")
+
+    def test_download_leaves_pre_signed_urls_unauthenticated(self):
+        self.route("GET", "/download.aspx", lambda *args: (200, {}, b"a,b\n"))
+
+        self.assertEqual(self.download(f"{self.base_url}/download.aspx?tempauth=x"), b"a,b\n")
+        headers = self.requests_to("/download.aspx")[0][2]
+        self.assertNotIn("Authorization", headers)
+        self.assertNotIn("Content-Type", headers)
+
+    # --- Waiting for files ---
+    def test_wait_for_file_polls_the_path_when_the_delta_link_expires(self):
+        probes = []
+
+        def item(path, headers, body):
+            probes.append(path)
+            if len(probes) < 3:
+                return 404, {}, {"error": {"code": "itemNotFound"}}
+            return 200, {}, {"id": "1", "name": "data.csv", "createdDateTime": "2024-01-01T00:00:00Z", "webUrl": "u"}
+        self.route("GET", "token=latest", lambda *args: (200, {}, {"value": [], "@odata.deltaLink": f"{_GRAPH}/v1.0/delta1"}))
+        self.route("GET", "/delta1", lambda *args: (410, {}, {"error": {"code": "resyncRequired"}}))
+        self.route("HEAD", "/root:/reports/data.csv", item)
+        self.route("GET", "/root:/reports/data.csv", item)
+
+        item = self.sp.wait_for_file("site-1", "drive-1", "reports", "data.csv", timeout=30)
+
+        self.assertEqual(item["name"], "data.csv")
+        self.assertEqual(len(self.requests_to("/delta1")), 1)
+
+    def test_drive_changes_raise_on_failed_pages(self):
+        self.route("GET", "/delta1", lambda *args: (503, {}, {"error": {"code": "serviceNotAvailable"}}))
+
+        with self.assertRaisesRegex(Exception, "Failed to retrieve drive changes: 503"):
+            self.sp.get_drive_changes(f"{_GRAPH}/v1.0/delta1")
+
+    def test_drive_subscription_returns_the_created_subscription(self):
+        self.route("POST", "/subscriptions", lambda path, headers, body: (201, {}, {"id": "sub-1", **json.loads(body)}))
+
+        subscription = self.sp.create_drive_subscription("drive-1", "https://hooks.example/graph", client_state="s")
+
+        self.assertEqual((subscription["id"], subscription["resource"]), ("sub-1", "/drives/drive-1/root"))
+
+    # --- Resumable uploads ---
+    def upload_in_chunks(self, content, file_size, last_status):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "data.bin")
+        with open(path, "wb") as file:
+            file.write(content)
+        self.route("POST", "/createUploadSession", lambda *args: (200, {}, {"uploadUrl": f"{self.base_url}/upload"}))
+
+        def chunk(path, headers, body):
+            end, total = headers["Content-Range"].split("-")[1].split("/")
+            return (last_status if int(end) + 1 == int(total) else 202), {}, {}
+        self.route("PUT", "/upload", chunk)
+        self.route("DELETE", "/upload", lambda *args: (204, {}, b""))
+        with mock.patch.object(sharepoint_class, "_UPLOAD_CHUNK_SIZE", 4):
+            self.sp._SharePointAccess__upload_in_chunks(f"{_GRAPH}/v1.0/drives/d/root:/f/data.bin", path, file_size)
+
+    def test_upload_sends_every_range_without_the_bearer_token(self):
+        self.upload_in_chunks(b"0123456789", 10, 201)
+
+        puts = self.requests_to("/upload", "PUT")
+        self.assertEqual([r[2]["Content-Range"] for r in puts], ["bytes 0-3/10", "bytes 4-7/10", "bytes 8-9/10"])
+        self.assertEqual(b"".join(r[3] for r in puts), b"0123456789")
+        self.assertTrue(all("Authorization" not in r[2] for r in puts))
+
+    def test_upload_stops_when_the_file_shrinks(self):
+        with self.assertRaisesRegex(Exception, "shrank during upload"):
+            self.upload_in_chunks(b"012345", 10, 201)
+
+        self.assertEqual(len(self.requests_to("/upload", "PUT")), 2)
+        self.assertEqual(len(self.requests_to("/upload", "DELETE")), 1)
+
+    def test_upload_rejects_an_incomplete_last_chunk(self):
+        with self.assertRaisesRegex(Exception, "failed at bytes 8-9: 202"):
+            self.upload_in_chunks(b"0123456789", 10, 202)
+
+        self.assertEqual(len(self.requests_to("/upload", "DELETE")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()